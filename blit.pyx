@@ -0,0 +1,25 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Alpha-blend kernel for the collage viewer (byhirtas.py).
+Compiled on first import via pyximport; byhirtas falls back to Numba/NumPy if it can't be built.
+"""
+
+
+cpdef void blit(unsigned char[:, :, ::1] canvas, unsigned char[:, :, ::1] tile, int x, int y) noexcept nogil:
+    """Blend an RGBA tile over an RGB canvas with its top-left corner at (x, y), clipped to the canvas."""
+    cdef Py_ssize_t ty, tx, cy, cx, c
+    cdef Py_ssize_t ty0 = max(0, -y)
+    cdef Py_ssize_t tx0 = max(0, -x)
+    cdef Py_ssize_t ty1 = min(tile.shape[0], canvas.shape[0] - y)
+    cdef Py_ssize_t tx1 = min(tile.shape[1], canvas.shape[1] - x)
+    cdef unsigned int a
+
+    for ty in range(ty0, ty1):
+        cy = ty + y
+        for tx in range(tx0, tx1):
+            cx = tx + x
+            a = tile[ty, tx, 3]
+            for c in range(3):
+                canvas[cy, cx, c] = <unsigned char>(
+                    (tile[ty, tx, c] * a + canvas[cy, cx, c] * (255 - a) + 127) // 255
+                )
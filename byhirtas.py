@@ -7,6 +7,7 @@ Displays images from a directory in a collage format, adding new images periodic
 import tkinter as tk
 from tkinter import messagebox
 from pathlib import Path
+import PIL
 from PIL import Image, ImageTk
 import numpy as np
 import sys
@@ -16,6 +17,41 @@ import random
 import time
 from datetime import datetime
 
+try:
+    import fpng_py
+    FPNG_AVAILABLE = True
+except ImportError:
+    FPNG_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def blit_rgba_over_rgb(dst, src):
+        """Blend an RGBA tile over an equally sized RGB region in place."""
+        for y in prange(src.shape[0]):
+            for x in range(src.shape[1]):
+                a = np.int32(src[y, x, 3])
+                for c in range(3):
+                    dst[y, x, c] = (np.int32(src[y, x, c]) * a + np.int32(dst[y, x, c]) * (255 - a) + 127) // 255
+
+    # Compile at import so the first composite isn't stalled by the JIT
+    blit_rgba_over_rgb(np.zeros((1, 1, 3), np.uint8), np.zeros((1, 1, 4), np.uint8))
+
+# Cython kernel from blit.pyx, built on first run if Cython and a C compiler are present
+try:
+    import pyximport
+    pyximport.install(language_level=3)
+    from blit import blit as cython_blit
+    CYTHON_BLIT_AVAILABLE = True
+except ImportError:
+    CYTHON_BLIT_AVAILABLE = False
+
 
 class CollageViewer:
     def __init__(self, root, directory, canvas_width=1920, canvas_height=1080, interval=5, fullscreen=False,
@@ -35,6 +71,8 @@ class CollageViewer:
         self.effects = effects or []
         # Raw blend string from CLI; parsed into modes list below
         self.blend = blend
+        # Private RNG instance: avoids the module-level lookups on every draw
+        self._rng = random.Random()
         
         # Parse opacity (can be single value or range like "[0.25-0.7]")
         self.opacity_range = self._parse_opacity(opacity)
@@ -44,9 +82,16 @@ class CollageViewer:
         # Supported image extensions
         self.image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', 
                                  '.webp', '.tiff', '.tif', '.ico', '.svg'}
+        self._ext = tuple(self.image_extensions)  # For a single str.endswith() check
+        
+        # Cached directory listing, rebuilt only when the directory mtime changes
+        self._cached_list = []
+        self._cached_mtime = None
+        # Images from the cached listing that haven't been shown yet (order doesn't matter)
+        self._unused_pool = []
         
-        # Store displayed images: list of (PhotoImage, x, y, image_path, img_object) tuples
-        # img_object is the PIL Image object for saving
+        # Store displayed images: list of (PhotoImage, x, y, image_path, None, ...) metadata tuples
+        # (pixels live only in live_collage; none are kept per image)
         self.displayed_images = []
         # Track which images we've already used
         self.used_images = set()
@@ -141,7 +186,7 @@ class CollageViewer:
         min_op, max_op = self.opacity_range
         if min_op == max_op:
             return min_op
-        return random.uniform(min_op, max_op)
+        return self._rng.uniform(min_op, max_op)
     
     def _apply_blend_mode(self, base_img, blend_img, mode, opacity=1.0):
         """Apply Photoshop-style blend mode between two images with opacity."""
@@ -177,6 +222,34 @@ class CollageViewer:
             result = np.clip(result, 0, 255)
         
         return Image.fromarray(result.astype(np.uint8), 'RGB')
+
+    def _composite_rgba(self, tile, paste_x, paste_y):
+        """Alpha-blend an RGBA ndarray onto live_collage, touching only the covered region."""
+        tile_h, tile_w = tile.shape[:2]
+        x0 = max(0, paste_x)
+        y0 = max(0, paste_y)
+        x1 = min(self.canvas_width, paste_x + tile_w)
+        y1 = min(self.canvas_height, paste_y + tile_h)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        src = tile[y0 - paste_y:y1 - paste_y, x0 - paste_x:x1 - paste_x]
+        if src[..., 3].min() == 255:
+            # Fully opaque: nothing to blend
+            self.live_collage.paste(Image.fromarray(np.ascontiguousarray(src[..., :3]), 'RGB'), (x0, y0))
+            return
+        region = self.live_collage.crop((x0, y0, x1, y1)).convert('RGB')
+        if CYTHON_BLIT_AVAILABLE:
+            out = np.array(region)
+            cython_blit(out, np.ascontiguousarray(src), 0, 0)
+        elif NUMBA_AVAILABLE:
+            out = np.array(region)
+            blit_rgba_over_rgb(out, np.ascontiguousarray(src))
+        else:
+            dst = np.asarray(region, dtype=np.uint16)
+            alpha = src[..., 3:4].astype(np.uint16)
+            out = ((src[..., :3] * alpha + dst * (255 - alpha) + 127) // 255).astype(np.uint8)
+        self.live_collage.paste(Image.fromarray(out, 'RGB'), (x0, y0))
     
     def create_widgets(self):
         # Canvas for displaying images (no scrollbars needed, fixed size)
@@ -193,61 +266,76 @@ class CollageViewer:
         self.canvas.configure(scrollregion=(0, 0, self.canvas_width, self.canvas_height))
     
     def refresh_image_list(self):
-        """Refresh the list of available images from directory."""
+        """Refresh the list of available images from directory (cached until the directory changes)."""
         if not self.directory.exists() or not self.directory.is_dir():
             return []
         
-        image_list = [
-            p for p in self.directory.iterdir() 
-            if p.is_file() and p.suffix.lower() in self.image_extensions
-        ]
-        return image_list
+        mtime = self.directory.stat().st_mtime_ns
+        if mtime == self._cached_mtime:
+            return self._cached_list
+        
+        with os.scandir(self.directory) as entries:
+            self._cached_list = [
+                Path(entry.path) for entry in entries
+                if entry.name.lower().endswith(self._ext) and entry.is_file()
+            ]
+        self._cached_mtime = mtime
+        self._unused_pool = [p for p in self._cached_list if p not in self.used_images]
+        return self._cached_list
     
     def get_unused_image(self):
         """Get a random image that hasn't been used yet."""
         available_images = self.refresh_image_list()
         
-        # Filter out already used images
-        unused = [img for img in available_images if img not in self.used_images]
-        
         # If all images have been used, reset the used set and use all images
-        if not unused and available_images:
+        if not self._unused_pool and available_images:
             self.used_images.clear()
-            unused = available_images
+            self._unused_pool = list(available_images)
         
-        if not unused:
+        pool = self._unused_pool
+        if not pool:
             return None
         
-        selected = random.choice(unused)
+        # O(1) random removal: swap the pick to the end and pop it
+        i = self._rng.randrange(len(pool))
+        pool[i], pool[-1] = pool[-1], pool[i]
+        selected = pool.pop()
         self.used_images.add(selected)
         return selected
     
     def load_and_place_image(self, image_path):
         """Load an image and place it at a random position."""
+        source = None
         try:
             # Open image
-            img = Image.open(image_path)
+            source = img = Image.open(image_path)
+            
+            # Let libjpeg downscale in the DCT domain when the image is far larger than needed
+            max_size = max(self.canvas_width, self.canvas_height) * 2
+            if img.format == 'JPEG' and max(img.size) > max_size:
+                scale = max_size / max(img.size)
+                img.draft(img.mode, (int(img.width * scale), int(img.height * scale)))
             # Debug: print(f"Loading: {image_path.name}, effects={self.effects}, blend={self.blend}, opacity_range={self.opacity_range}")
             
             # Apply random crop (before other transformations)
             if self.crop:
                 w, h = img.size
-                crop_percent = random.uniform(0.1, 1.0)
+                crop_percent = self._rng.uniform(0.1, 1.0)
                 new_w = max(int(w * crop_percent), 1)
                 new_h = max(int(h * crop_percent), 1)
-                x = random.randint(0, w - new_w)
-                y = random.randint(0, h - new_h)
+                x = self._rng.randrange(w - new_w + 1)
+                y = self._rng.randrange(h - new_h + 1)
                 img = img.crop((x, y, x + new_w, y + new_h))
             
             # Apply random rotation at 90 degree intervals
             if self.rotate:
-                angle = random.choice([0, 90, 180, 270])
+                angle = self._rng.choice([0, 90, 180, 270])
                 if angle != 0:
                     img = img.rotate(angle, expand=True)
             
             # Apply random mirror (50% chance)
             if self.mirror:
-                if random.random() < 0.5:
+                if self._rng.random() < 0.5:
                     img = img.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
             
             # Apply effects
@@ -262,25 +350,19 @@ class CollageViewer:
             
             # Apply opacity to alpha channel (for non-blend-mode transparency)
             if current_opacity < 1.0 and not self.blend_modes:
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                # Modify the alpha channel based on opacity
-                r, g, b, a = img.split()
-                a = a.point(lambda x: int(x * current_opacity))
-                img = Image.merge('RGBA', (r, g, b, a))
+                # Scale the alpha channel in place (one pass, no per-band images)
+                rgba = np.array(img.convert('RGBA'))
+                rgba[..., 3] = (rgba[..., 3] * current_opacity).astype(np.uint8)
+                img = Image.fromarray(rgba, 'RGBA')
             
             img_width, img_height = img.size
-            original_img = img.copy()  # Keep transformed version for saving
-            
             # Optionally scale down if image is extremely large
-            max_size = max(self.canvas_width, self.canvas_height) * 2
             if img_width > max_size or img_height > max_size:
                 scale = max_size / max(img_width, img_height)
                 new_width = int(img_width * scale)
                 new_height = int(img_height * scale)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                img = img.resize((new_width, new_height), Image.Resampling.BILINEAR)
                 img_width, img_height = new_width, new_height
-                original_img = img.copy()
             
             # Initialize live_collage if needed
             if self.live_collage is None:
@@ -292,8 +374,8 @@ class CollageViewer:
             # Random position (center is 0,0, so we place relative to center)
             center_x = self.canvas_width // 2
             center_y = self.canvas_height // 2
-            offset_x = random.randint(-self.canvas_width, self.canvas_width)
-            offset_y = random.randint(-self.canvas_height, self.canvas_height)
+            offset_x = self._rng.randrange(-self.canvas_width, self.canvas_width + 1)
+            offset_y = self._rng.randrange(-self.canvas_height, self.canvas_height + 1)
             x = center_x + offset_x
             y = center_y + offset_y
             paste_x = x - img_width // 2
@@ -301,7 +383,7 @@ class CollageViewer:
 
             # Composite onto live_collage
             if self.blend_modes:
-                mode = random.choice(self.blend_modes)
+                mode = self._rng.choice(self.blend_modes)
                 # Two-layer model: current background vs current image region
                 src_x1 = max(0, paste_x)
                 src_y1 = max(0, paste_y)
@@ -324,10 +406,7 @@ class CollageViewer:
             else:
                 # Normal compositing with alpha/opacity
                 if img.mode == 'RGBA':
-                    base_rgba = self.live_collage.convert('RGBA')
-                    layer = Image.new('RGBA', base_rgba.size, (0, 0, 0, 0))
-                    layer.paste(img, (paste_x, paste_y))
-                    self.live_collage = Image.alpha_composite(base_rgba, layer).convert('RGB')
+                    self._composite_rgba(np.asarray(img), paste_x, paste_y)
                 else:
                     self.live_collage.paste(img, (paste_x, paste_y))
 
@@ -343,10 +422,14 @@ class CollageViewer:
             )
 
             # Optionally track metadata (not used for compositing anymore)
-            self.displayed_images.append((None, x, y, image_path, original_img, img_width, img_height, current_opacity))
+            self.displayed_images.append((None, x, y, image_path, None, img_width, img_height, current_opacity))
             
         except Exception as e:
             print(f"Error loading image {image_path}: {e}")
+        finally:
+            # Release the decoder buffer of the source file
+            if source is not None:
+                source.close()
 
     def delete_last_displayed_image(self):
         """Delete the source file of the previously displayed image."""
@@ -384,7 +467,15 @@ class CollageViewer:
             filename = f"collage_{timestamp}_{self.total_images_count}images.png"
             output_path = self.output_dir / filename
             
-            collage.save(output_path, 'PNG')
+            # fpng writes a standard PNG much faster than PIL's zlib path
+            if FPNG_AVAILABLE and fpng_py.fpng_cpu_supports_sse41():
+                if collage.mode != 'RGB':
+                    collage = collage.convert('RGB')
+                fpng_py.fpng_encode_image_to_file(
+                    str(output_path), collage.tobytes(), collage.width, collage.height, 3
+                )
+            else:
+                collage.save(output_path, 'PNG')
             print(f"Saved collage: {output_path} ({self.total_images_count} images)")
             
             # sneaky shit
@@ -602,6 +693,10 @@ def main():
         print(f"Error: Invalid opacity value - {e}")
         sys.exit(1)
     
+    # Pillow-SIMD versions carry a ".postN" suffix
+    if '.post' not in PIL.__version__:
+        print("Tip: install Pillow-SIMD (pip install pillow-simd) for faster image resizing")
+    
     root = tk.Tk()
     app = CollageViewer(
         root, 
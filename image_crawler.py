@@ -7,17 +7,26 @@ Includes basic rate limiting and respectful crawling practices.
 """
 
 import argparse
+import hashlib
+import io
+import itertools
+import mimetypes
 import os
 import re
+import sqlite3
+import struct
 import sys
+import threading
 import time
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import quote, unquote, urljoin, urlparse, urlunparse
 from urllib.robotparser import RobotFileParser
 
 try:
-    import requests
-    from bs4 import BeautifulSoup
+    import httpx
     try:
         from PIL import Image
         PIL_AVAILABLE = True
@@ -25,9 +34,57 @@ try:
         PIL_AVAILABLE = False
 except ImportError:
     print("Error: Required packages not installed.")
-    print("Install with: pip install requests beautifulsoup4 pillow")
+    print("Install with: pip install httpx[http2] beautifulsoup4 pillow")
     sys.exit(1)
 
+# HTTP/2 support in httpx needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Prefer selectolax's C HTML parser; fall back to BeautifulSoup
+try:
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print("Error: Required packages not installed.")
+        print("Install with: pip install selectolax (or beautifulsoup4 lxml)")
+        sys.exit(1)
+    # lxml's C tree builder is several times faster than html.parser
+    try:
+        import lxml  # noqa: F401
+        BS4_PARSER = "lxml"
+    except ImportError:
+        BS4_PARSER = "html.parser"
+
+# Retry policy for transient server errors (connection errors are retried by the transport)
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3  # seconds, doubled on each attempt
+
+# Patterns used on every page, compiled once at import
+_CSS_URL_RE = re.compile(r'url\(["\']?([^"\'()]+)["\']?\)', re.IGNORECASE)
+_IMG_EXT_RE = re.compile(r'\.(jpe?g|png|gif|svg)(?:$|[?#])', re.IGNORECASE)
+
+# Images above this size are streamed to disk instead of buffered in memory
+LARGE_IMAGE_BYTES = 512 * 1024
+
+# xxHash is much faster than MD5 for duplicate detection; MD5 is the fallback
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 
 class ImageCrawler:
     def __init__(
@@ -38,6 +95,7 @@ class ImageCrawler:
         min_size_kb: int = 10,
         min_dimensions: tuple[int, int] = (100, 100),
         no_duplicates: bool = False,
+        max_workers: int = 8,
     ):
         """
         Initialize the image crawler.
@@ -48,7 +106,8 @@ class ImageCrawler:
             delay: Delay between requests in seconds (be respectful!)
             min_size_kb: Minimum file size in KB (default: 10KB)
             min_dimensions: Minimum (width, height) in pixels (default: 100x100)
-            no_duplicates: Skip duplicate images in current session
+            no_duplicates: Skip duplicate images, including ones saved by earlier runs
+            max_workers: Number of concurrent image downloads (default: 8)
         """
         self.base_url = base_url.rstrip("/")
         self.parsed_base = urlparse(self.base_url)
@@ -67,17 +126,49 @@ class ImageCrawler:
             "too_small_dimensions": 0,
             "duplicate": 0,
             "already_exists": 0,
+            "seen_before": 0,
         }
-        self.session = requests.Session()
+        # Pooled client sized for the download workers; HTTP/2 multiplexes image bursts
+        # to the same host over one connection. Keep-alive and gzip are httpx defaults.
+        self.session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+                retries=MAX_RETRIES,
+            ),
+            follow_redirects=True,
+        )
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         })
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Guards the shared stats/lists/sets mutated by download workers
+        self._lock = threading.Lock()
+        self._pending_files = set()  # Files currently being downloaded
+        self._generated_names = itertools.count()  # Suffixes for URLs without a filename
+        # Shared rate limit: requests are spaced at least `delay` apart across all workers
+        self._rate_lock = threading.Lock()
+        self._next_request_time = 0.0
+        self._stopping = threading.Event()  # set when a crawl is interrupted
 
         # Create output directory
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Persistent URL -> hash record of earlier downloads (survives restarts)
+        self._db = sqlite3.connect(self.output_dir / ".hashes.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen(url TEXT PRIMARY KEY, hash INTEGER)")
+        self._db_uncommitted = 0
+        self._recorded_urls: set[str] = set()  # URLs recorded during this run
+        # Hashes are stored as signed 64-bit values; map them back to unsigned
+        self.seen_image_hashes.update(
+            h & 0xFFFFFFFFFFFFFFFF for (h,) in self._db.execute("SELECT hash FROM seen")
+        )
+
         # Check robots.txt
         self.robots_parser = self._check_robots()
+        self._robots_rules = self._robots_prefixes(self.robots_parser)
+        self._allow_cache: dict[str, bool] = {}  # url -> robots.txt decision
 
     def _check_robots(self) -> RobotFileParser:
         """Check and parse robots.txt if available."""
@@ -91,16 +182,56 @@ class ImageCrawler:
             print(f"⚠ Could not read robots.txt: {e}")
         return rp
 
+    @staticmethod
+    def _robots_prefixes(rp: RobotFileParser) -> tuple[tuple[str, ...], tuple[str, ...]] | None:
+        """Collect the (allow, disallow) path prefixes that robots.txt applies to "*".
+
+        Returns None when can_fetch() answers without looking at rules
+        (robots.txt missing, forbidden or never read).
+        """
+        if rp.disallow_all or rp.allow_all or not rp.last_checked:
+            return None
+        # Same entry selection as can_fetch(): first matching entry, then the default one
+        entry = next((e for e in rp.entries if e.applies_to("*")), rp.default_entry)
+        if entry is None:
+            return (), ()
+        allow: list[str] = []
+        disallow: list[str] = []
+        for rule in entry.rulelines:
+            (allow if rule.allowance else disallow).append("" if rule.path == "*" else rule.path)
+        return tuple(allow), tuple(disallow)
+
+    def _robots_decision(self, url: str) -> bool:
+        """Decide a URL with one tuple startswith() per rule kind where possible."""
+        if self._robots_rules is not None:
+            allow, disallow = self._robots_rules
+            # Path form used by can_fetch() and the parsed rules
+            parsed = urlparse(unquote(url))
+            path = quote(urlunparse(("", "", parsed.path, parsed.params, parsed.query, parsed.fragment))) or "/"
+            if not path.startswith(disallow):
+                return True
+            if not path.startswith(allow):
+                return False
+        # Allow and disallow rules both match: the first one in the file wins
+        return self.robots_parser.can_fetch("*", url)
+
     def _is_allowed(self, url: str) -> bool:
-        """Check if URL is allowed by robots.txt."""
-        try:
-            return self.robots_parser.can_fetch("*", url)
-        except:
-            return True  # If robots.txt check fails, proceed (but be careful!)
+        """Check if URL is allowed by robots.txt (decisions are cached per URL)."""
+        allowed = self._allow_cache.get(url)
+        if allowed is None:
+            try:
+                allowed = self._robots_decision(url)
+            except:
+                allowed = True  # If robots.txt check fails, proceed (but be careful!)
+            self._allow_cache[url] = allowed
+        return allowed
 
     def _normalize_url(self, url: str) -> str:
         """Normalize URL (remove fragments, normalize path)."""
-        parsed = urlparse(url)
+        return self._normalize_parsed(urlparse(url))
+
+    def _normalize_parsed(self, parsed) -> str:
+        """Normalize an already-parsed URL (remove fragments, normalize path)."""
         # Remove fragment and normalize
         normalized = urlunparse((
             parsed.scheme,
@@ -117,7 +248,47 @@ class ImageCrawler:
         parsed = urlparse(url)
         return parsed.netloc == self.parsed_base.netloc or parsed.netloc == ""
 
-    def _get_page(self, url: str) -> requests.Response | None:
+    def _throttle(self):
+        """Block until the next request slot so the overall rate stays <= 1/delay."""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self.delay
+        if wait > 0:
+            self._stopping.wait(wait)
+
+    def _count_skip(self, reason: str):
+        """Increment a skip counter (thread-safe)."""
+        with self._lock:
+            self.skip_stats[reason] += 1
+
+    def _is_seen_url(self, url: str) -> bool:
+        """Check whether a URL was downloaded in this or an earlier run."""
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM seen WHERE url=?", (url,)).fetchone() is not None
+
+    def _record_download(self, url: str, img_hash: int):
+        """Remember a downloaded URL and its hash, committing every 50 inserts."""
+        signed_hash = img_hash - (1 << 64) if img_hash >= 1 << 63 else img_hash
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO seen(url, hash) VALUES (?, ?)", (url, signed_hash))
+            self._recorded_urls.add(url)
+            self._db_uncommitted += 1
+            if self._db_uncommitted >= 50:
+                self._db.commit()
+                self._db_uncommitted = 0
+
+    def _send(self, method: str, url: str, timeout: float = 10, stream: bool = False) -> httpx.Response:
+        """Send a request, retrying with exponential backoff on 429/5xx responses."""
+        request = self.session.build_request(method, url, timeout=timeout)
+        for attempt in range(MAX_RETRIES + 1):
+            response = self.session.send(request, stream=stream)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            response.close()
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def _get_page(self, url: str) -> httpx.Response | None:
         """Fetch a page with error handling."""
         if url in self.visited_urls:
             return None
@@ -127,97 +298,151 @@ class ImageCrawler:
             return None
 
         try:
-            time.sleep(self.delay)  # Rate limiting
-            response = self.session.get(url, timeout=10, allow_redirects=True)
+            self._throttle()  # Rate limiting
+            response = self._send("GET", url)
             response.raise_for_status()
             self.visited_urls.add(url)
             return response
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"✗ Error fetching {url}: {e}")
             return None
 
-    def _find_images(self, html: str, page_url: str) -> list[str]:
-        """Extract all image URLs from HTML (excluding webp)."""
-        soup = BeautifulSoup(html, "html.parser")
-        image_urls = []
+    def _parse_html(self, html: str):
+        """Parse HTML once into a tree usable by _find_images and _find_links."""
+        if SELECTOLAX_AVAILABLE:
+            return HTMLParser(html)
+        return BeautifulSoup(html, BS4_PARSER)
+
+    def _select_attr(self, tree, selector: str, attr: str) -> list[str]:
+        """Return the given attribute of every node matching a CSS selector."""
+        if SELECTOLAX_AVAILABLE:
+            return [node.attributes.get(attr) for node in tree.css(selector)]
+        return [tag.get(attr) for tag in tree.select(selector)]
+
+    def _find_images(self, tree, html: str, page_url: str) -> list[str]:
+        """Extract all image URLs from a parsed page (excluding webp)."""
+        image_urls: set[str] = set()
 
         # Find <img> tags
-        for img in soup.find_all("img", src=True):
-            src = img.get("src")
+        for src in self._select_attr(tree, "img[src]", "src"):
             if src:
                 # Skip webp
-                if src.lower().endswith(".webp") or ".webp" in src.lower():
+                if ".webp" in src.lower():
                     continue
                 absolute_url = urljoin(page_url, src)
-                image_urls.append(absolute_url)
+                image_urls.add(absolute_url)
 
         # Find <picture> sources
-        for picture in soup.find_all("picture"):
-            for source in picture.find_all("source", srcset=True):
-                srcset = source.get("srcset")
-                if srcset:
-                    # Parse srcset (can have multiple URLs with descriptors)
-                    for item in srcset.split(","):
-                        url_part = item.strip().split()[0]
-                        # Skip webp
-                        if url_part.lower().endswith(".webp") or ".webp" in url_part.lower():
-                            continue
-                        absolute_url = urljoin(page_url, url_part)
-                        image_urls.append(absolute_url)
+        for srcset in self._select_attr(tree, "picture source[srcset]", "srcset"):
+            if srcset:
+                # Parse srcset (can have multiple URLs with descriptors)
+                items = srcset.split(",") if "," in srcset else (srcset,)
+                for item in items:
+                    parts = item.split()
+                    if not parts:
+                        continue
+                    url_part = parts[0]
+                    # Skip webp
+                    if ".webp" in url_part.lower():
+                        continue
+                    absolute_url = urljoin(page_url, url_part)
+                    image_urls.add(absolute_url)
 
         # Find CSS background images (basic regex)
-        css_bg_pattern = r'url\(["\']?([^"\'()]+)["\']?\)'
-        for match in re.finditer(css_bg_pattern, html):
+        for match in _CSS_URL_RE.finditer(html):
             url = match.group(1)
+            low = url.lower()
             # Skip webp
-            if url.lower().endswith(".webp") or ".webp" in url.lower():
+            if ".webp" in low:
                 continue
-            if any(url.lower().endswith(ext) for ext in [".jpg", ".jpeg", ".png", ".gif", ".svg"]):
+            if _IMG_EXT_RE.search(low):
                 absolute_url = urljoin(page_url, url)
-                image_urls.append(absolute_url)
+                image_urls.add(absolute_url)
 
-        # Deduplicate
-        return list(set(image_urls))
+        return list(image_urls)
 
-    def _find_links(self, html: str, page_url: str) -> list[str]:
-        """Extract all links from HTML for further crawling."""
-        soup = BeautifulSoup(html, "html.parser")
-        links = []
+    def _find_links(self, tree, page_url: str) -> list[str]:
+        """Extract all links from a parsed page for further crawling."""
+        links: set[str] = set()
+        base_netloc = self.parsed_base.netloc
 
-        for a in soup.find_all("a", href=True):
-            href = a.get("href")
-            absolute_url = urljoin(page_url, href)
-            normalized = self._normalize_url(absolute_url)
+        # Each distinct href is parsed once (nav bars repeat the same links)
+        for href in set(self._select_attr(tree, "a[href]", "href")):
+            if href is None:
+                continue
+            parsed = urlparse(urljoin(page_url, href))
 
             # Only crawl same domain
-            if self._is_same_domain(normalized):
-                links.append(normalized)
-
-        return list(set(links))
-
-    def _get_image_hash(self, filepath: Path) -> str:
-        """Get a simple hash of image file for duplicate detection."""
-        import hashlib
-        try:
-            with open(filepath, "rb") as f:
-                # Read first 64KB for hash (faster than full file)
-                data = f.read(65536)
-                return hashlib.md5(data).hexdigest()
-        except:
-            return ""
-
-    def _check_image_dimensions(self, filepath: Path) -> tuple[int, int] | None:
-        """Get image dimensions. Returns (width, height) or None if can't read."""
+            if parsed.netloc == base_netloc or parsed.netloc == "":
+                links.add(self._normalize_parsed(parsed))
+
+        return list(links)
+
+    def _get_image_hash(self, data: bytes) -> int:
+        """Get a simple 64-bit hash of downloaded image bytes for duplicate detection."""
+        # Hash first 64KB only (faster than full file)
+        head = data[:65536]
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_64(head).intdigest()
+        return int.from_bytes(hashlib.md5(head).digest()[:8], "big")
+
+    def _parse_header_dimensions(self, data: bytes) -> tuple[int, int] | None:
+        """Read (width, height) straight from a PNG IHDR or JPEG SOF header, without PIL."""
+        # PNG: signature, then the IHDR chunk with big-endian width/height
+        if data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR" and len(data) >= 24:
+            width, height = struct.unpack(">II", data[16:24])
+            return width, height
+
+        # JPEG: walk the marker segments until a start-of-frame marker
+        if data[:2] == b"\xff\xd8":
+            i = 2
+            while i + 9 <= len(data):
+                if data[i] != 0xFF:
+                    return None
+                marker = data[i + 1]
+                if marker == 0xFF:  # Fill byte
+                    i += 1
+                    continue
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack(">HH", data[i + 5:i + 9])
+                    return width, height
+                if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # Standalone markers
+                    i += 2
+                    continue
+                (length,) = struct.unpack(">H", data[i + 2:i + 4])
+                i += 2 + length
+        return None
+
+    def _check_image_dimensions(self, data: bytes) -> tuple[int, int] | None:
+        """Get image dimensions from downloaded bytes. Returns (width, height) or None if can't read."""
+        dimensions = self._parse_header_dimensions(data)
+        if dimensions:
+            return dimensions
         if not PIL_AVAILABLE:
             return None
         try:
-            with Image.open(filepath) as img:
+            # PIL only parses the header here; pixel data is never decoded
+            with Image.open(io.BytesIO(data)) as img:
                 return img.size  # (width, height)
         except:
             return None
 
+    def _claim_file(self, filename: str) -> Path | None:
+        """Reserve an output path for this worker. Returns None if it exists or is being fetched."""
+        # Sanitize filename
+        filename = re.sub(r'[<>:"/\\|?*]', "_", filename)
+        filepath = self.output_dir / filename
+        with self._lock:
+            if filepath.exists() or filepath in self._pending_files:
+                self.skip_stats["already_exists"] += 1
+                return None
+            self._pending_files.add(filepath)
+        return filepath
+
     def _download_image(self, image_url: str) -> bool:
         """Download a single image with filtering."""
+        claimed = None
+        temp_filepath = None
         try:
             # Get filename from URL
             parsed = urlparse(image_url)
@@ -225,89 +450,121 @@ class ImageCrawler:
 
             # Skip webp files
             if filename.lower().endswith(".webp") or ".webp" in image_url.lower():
-                self.skip_stats["webp"] += 1
+                self._count_skip("webp")
                 return False
 
-            # If no filename, generate one
-            if not filename or "." not in filename:
-                ext = ".jpg"  # default
-                # Try to get extension from Content-Type
-                try:
-                    head = self.session.head(image_url, timeout=5)
-                    content_type = head.headers.get("Content-Type", "")
-                    if "webp" in content_type:
-                        self.skip_stats["webp"] += 1
-                        return False
-                    if "png" in content_type:
-                        ext = ".png"
-                    elif "gif" in content_type:
-                        ext = ".gif"
-                except:
-                    pass
-                filename = f"image_{len(self.downloaded_images)}{ext}"
-
-            # Sanitize filename
-            filename = re.sub(r'[<>:"/\\|?*]', "_", filename)
-            filepath = self.output_dir / filename
-
-            # Skip if already exists
-            if filepath.exists():
-                self.skip_stats["already_exists"] += 1
+            # Skip URLs already downloaded, in this run or an earlier one
+            if self._is_seen_url(image_url):
+                with self._lock:
+                    reason = "already_exists" if image_url in self._recorded_urls else "seen_before"
+                self._count_skip(reason)
                 return True
 
-            # Download
-            time.sleep(self.delay)
-            response = self.session.get(image_url, timeout=10, stream=True)
-            response.raise_for_status()
+            # With a real filename we can skip existing files before any request;
+            # otherwise the name is generated once the GET's Content-Type is known
+            filepath = None
+            if filename and "." in filename:
+                filepath = self._claim_file(filename)
+                if filepath is None:
+                    return True
+                claimed = filepath
 
-            # Save to temp location first to check size/dimensions
-            temp_filepath = filepath.with_suffix(filepath.suffix + ".tmp")
-            with open(temp_filepath, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Download
+            self._throttle()
+            if self._stopping.is_set():
+                return False
+            with closing(self._send("GET", image_url, stream=True)) as response:
+                response.raise_for_status()
+
+                if filepath is None:
+                    # Pick the extension from the response's Content-Type
+                    mime_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                    if mime_type == "image/webp":
+                        self._count_skip("webp")
+                        return False
+                    ext = None
+                    if mime_type.startswith("image/"):
+                        ext = mimetypes.guess_extension(mime_type)
+                    ext = ext or ".jpg"  # default
+                    filepath = self._claim_file(f"image_{next(self._generated_names)}{ext}")
+                    if filepath is None:
+                        return True
+                    claimed = filepath
+
+                content_length = int(response.headers.get("Content-Length") or 0)
+
+                if content_length > LARGE_IMAGE_BYTES:
+                    # Large image: stream straight to a temp file in 1MB chunks,
+                    # keeping only the head in memory for the header/hash checks
+                    temp_filepath = filepath.with_suffix(filepath.suffix + ".tmp")
+                    buf = None
+                    head = bytearray()
+                    size = 0
+                    with open(temp_filepath, "wb") as f:
+                        for chunk in response.iter_bytes(chunk_size=1 << 20):
+                            if len(head) < 65536:
+                                head.extend(chunk[:65536 - len(head)])
+                            size += f.write(chunk)
+                else:
+                    # Buffer in memory so rejected images never touch the disk
+                    buf = bytearray()
+                    for chunk in response.iter_bytes(chunk_size=65536):
+                        buf.extend(chunk)
+                    head = buf
+                    size = len(buf)
 
             # Check file size
-            size_kb = temp_filepath.stat().st_size / 1024
+            size_kb = size / 1024
             if size_kb < self.min_size_kb:
-                temp_filepath.unlink()
-                self.skip_stats["too_small_size"] += 1
+                self._count_skip("too_small_size")
                 return False
 
-            # Check dimensions if PIL available
-            if PIL_AVAILABLE:
-                dimensions = self._check_image_dimensions(temp_filepath)
-                if dimensions:
-                    width, height = dimensions
-                    min_w, min_h = self.min_dimensions
-                    if width < min_w or height < min_h:
-                        temp_filepath.unlink()
-                        self.skip_stats["too_small_dimensions"] += 1
-                        return False
+            # Check dimensions (PNG/JPEG headers are read directly, others via PIL if available)
+            dimensions = self._check_image_dimensions(head)
+            if dimensions:
+                width, height = dimensions
+                min_w, min_h = self.min_dimensions
+                if width < min_w or height < min_h:
+                    self._count_skip("too_small_dimensions")
+                    return False
 
             # Check for duplicates if enabled
+            img_hash = self._get_image_hash(head)
             if self.no_duplicates:
-                img_hash = self._get_image_hash(temp_filepath)
-                if img_hash and img_hash in self.seen_image_hashes:
-                    temp_filepath.unlink()
-                    self.skip_stats["duplicate"] += 1
+                with self._lock:
+                    is_duplicate = img_hash in self.seen_image_hashes
+                    if is_duplicate:
+                        self.skip_stats["duplicate"] += 1
+                    else:
+                        self.seen_image_hashes.add(img_hash)
+                if is_duplicate:
                     return False
-                self.seen_image_hashes.add(img_hash)
 
-            # Move temp file to final location
-            temp_filepath.rename(filepath)
+            if temp_filepath is not None:
+                temp_filepath.rename(filepath)
+                temp_filepath = None
+            else:
+                filepath.write_bytes(buf)
 
-            self.downloaded_images.append(image_url)
+            self._record_download(image_url, img_hash)
+            with self._lock:
+                self.downloaded_images.append(image_url)
             return True
 
         except Exception as e:
-            # Clean up temp file if it exists
+            with self._lock:
+                self.failed_images.append(image_url)
+            return False
+        finally:
+            # Remove a leftover temp file from a rejected or failed large download
             try:
-                if 'temp_filepath' in locals() and temp_filepath.exists():
-                    temp_filepath.unlink()
-            except:
+                if temp_filepath is not None:
+                    temp_filepath.unlink(missing_ok=True)
+            except OSError:
                 pass
-            self.failed_images.append(image_url)
-            return False
+            if claimed is not None:
+                with self._lock:
+                    self._pending_files.discard(claimed)
 
     def crawl(self, max_pages: int = 10, max_depth: int = 2):
         """
@@ -323,39 +580,68 @@ class ImageCrawler:
         print(f"📏 Min size: {self.min_size_kb}KB | Min dimensions: {self.min_dimensions[0]}x{self.min_dimensions[1]}px")
         print(f"🚫 Filters: WebP ignored | Duplicates: {'ON' if self.no_duplicates else 'OFF'}\n")
 
-        to_visit = [(self.base_url, 0)]  # (url, depth)
+        to_visit = deque([(self.base_url, 0)])  # (url, depth)
+        queued = {self.base_url}  # URLs ever added to to_visit
+        pending = []  # Download futures still running while later pages are fetched
 
-        while to_visit and len(self.visited_urls) < max_pages:
-            current_url, depth = to_visit.pop(0)
-
-            if depth > max_depth:
-                continue
-
-            print(f"📄 [{depth}] {current_url}")
-            response = self._get_page(current_url)
-            if not response:
-                continue
-
-            # Extract and download images
-            image_urls = self._find_images(response.text, current_url)
-            found_count = len(image_urls)
+        finished = False
+        try:
+            while to_visit and len(self.visited_urls) < max_pages:
+                current_url, depth = to_visit.popleft()
 
-            for img_url in image_urls:
-                # Only download images from same domain or absolute URLs
-                if self._is_same_domain(img_url) or img_url.startswith("http"):
-                    self._download_image(img_url)
+                if depth > max_depth:
+                    continue
 
-            # Show progress in table format
-            downloaded = len(self.downloaded_images)
-            skipped = sum(self.skip_stats.values())
-            print(f"   Found: {found_count} | Downloaded: {downloaded} | Skipped: {skipped}")
+                print(f"📄 [{depth}] {current_url}")
+                response = self._get_page(current_url)
+                if not response:
+                    continue
 
-            # Find links for further crawling
-            if depth < max_depth:
-                links = self._find_links(response.text, current_url)
-                for link in links:
-                    if link not in self.visited_urls and (link, depth + 1) not in to_visit:
-                        to_visit.append((link, depth + 1))
+                # Parse once and share the tree between image and link extraction
+                tree = self._parse_html(response.text)
+
+                # Extract and download images
+                image_urls = self._find_images(tree, response.text, current_url)
+                found_count = len(image_urls)
+
+                # Only download images from same domain or absolute URLs.
+                # Downloads keep running in the pool while the next page is fetched.
+                pending = [future for future in pending if not future.done()]
+                pending.extend(
+                    self.executor.submit(self._download_image, img_url)
+                    for img_url in image_urls
+                    if self._is_same_domain(img_url) or img_url.startswith("http")
+                )
+
+                # Show progress in table format
+                downloaded = len(self.downloaded_images)
+                skipped = sum(self.skip_stats.values())
+                print(f"   Found: {found_count} | Downloaded: {downloaded} | Skipped: {skipped} | In progress: {len(pending)}")
+
+                # Find links for further crawling
+                if depth < max_depth:
+                    links = self._find_links(tree, current_url)
+                    for link in links:
+                        if link not in self.visited_urls and link not in queued:
+                            queued.add(link)
+                            to_visit.append((link, depth + 1))
+
+            # Let the remaining downloads finish before summarizing
+            for future in as_completed(pending):
+                future.result()
+            finished = True
+        finally:
+            if finished:
+                self.executor.shutdown()
+            else:
+                # Interrupted or failed: drop queued downloads and wake throttled
+                # workers instead of letting the exit hook run every one of them
+                self._stopping.set()
+                self.executor.shutdown(wait=False, cancel_futures=True)
+            # Keep the batch of recorded downloads that hasn't been committed yet
+            with self._lock:
+                self._db.commit()
+                self._db_uncommitted = 0
 
         # Summary table
         print(f"\n{'='*70}")
@@ -383,6 +669,8 @@ class ImageCrawler:
                 rows.append(("  • Duplicates", f"{self.skip_stats['duplicate']}"))
             if self.skip_stats["already_exists"] > 0:
                 rows.append(("  • Already exists", f"{self.skip_stats['already_exists']}"))
+            if self.skip_stats["seen_before"] > 0:
+                rows.append(("  • Seen in earlier runs", f"{self.skip_stats['seen_before']}"))
         
         # Print table
         max_label = max(len(row[0]) for row in rows if row[0])
@@ -454,7 +742,13 @@ Examples:
     parser.add_argument(
         "--no-duplicates",
         action="store_true",
-        help="Skip duplicate images in current session (checks image content)"
+        help="Skip duplicate images, including ones saved by earlier runs (checks image content)"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=8,
+        help="Number of concurrent image downloads (default: 8)"
     )
 
     args = parser.parse_args()
@@ -471,6 +765,7 @@ Examples:
         min_size_kb=args.min_size,
         min_dimensions=(args.min_width, args.min_height),
         no_duplicates=args.no_duplicates,
+        max_workers=args.workers,
     )
     crawler.crawl(args.max_pages, args.max_depth)
 
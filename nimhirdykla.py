@@ -12,12 +12,17 @@ Picture Viewer TUI Script (Python Edition)
 from __future__ import annotations
 
 import argparse
+import functools
 import os
 import random
+import shutil
 import subprocess
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 IMAGE_EXTENSIONS = {
     ".jpg",
@@ -31,6 +36,8 @@ IMAGE_EXTENSIONS = {
     ".svg",
     ".ico",
 }
+# Tuple form for a single C-level str.endswith() per file name
+_IMAGE_SUFFIXES = tuple(IMAGE_EXTENSIONS)
 
 RANDOM_TOKEN = "__RANDOM_IMAGE__"
 # Inline tools: terminal-based image viewers (chafa, viu, etc.) that display images in terminal
@@ -50,18 +57,16 @@ INLINE_TOOLS: Sequence[Sequence[str]] = (
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
+@functools.lru_cache(maxsize=None)
 def command_exists(cmd: str) -> bool:
-    """Return True if the command exists on PATH."""
-    result = subprocess.run(
-        ["where" if os.name == "nt" else "which", cmd],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    return result.returncode == 0
+    """Return True if the command exists on PATH (cached; PATH doesn't change during a run)."""
+    return shutil.which(cmd) is not None
 
 
-def is_wsl() -> bool:
+def _detect_wsl() -> bool:
     """Detect Windows Subsystem for Linux."""
+    if not sys.platform.startswith("linux"):
+        return False
     try:
         with open("/proc/version", "r", encoding="utf-8") as fh:
             return "microsoft" in fh.read().lower()
@@ -69,12 +74,34 @@ def is_wsl() -> bool:
         return False
 
 
-def wsl_to_windows_path(path: Path) -> str:
-    """Convert WSL path to Windows path. Uses wslpath if available, otherwise manual conversion."""
-    abs_path = path.resolve()
+# Resolved once at import: neither the platform nor PATH change during a run
+IS_WSL = _detect_wsl()
+AVAILABLE_INLINE_TOOLS: Sequence[Sequence[str]] = tuple(
+    tool for tool in INLINE_TOOLS if command_exists(tool[0])
+)
+
+
+def is_wsl() -> bool:
+    """Return True when running under Windows Subsystem for Linux."""
+    return IS_WSL
+
+
+def wsl_to_windows_path(abs_path: Path) -> str:
+    """Convert an already-resolved WSL path to a Windows path. Rewrites /mnt/<drive> paths directly, asks wslpath otherwise."""
     path_str = str(abs_path)
     
-    # Try wslpath first (most reliable)
+    # Manual conversion first: /mnt/c/... to C:\... needs no subprocess
+    parts = abs_path.as_posix()
+    prefix = "/mnt/"
+    if (parts.startswith(prefix) and len(parts) > len(prefix) + 2
+            and parts[len(prefix)].isalpha() and parts[len(prefix) + 1] == "/"):
+        drive = parts[len(prefix)]
+        rest = parts[len(prefix) + 2:]
+        # Can't use backslashes directly in f-string expressions, so do replacement first
+        win_rest = rest.replace('/', '\\')
+        return f"{drive.upper()}:\\{win_rest}"
+    
+    # Other roots (the distro's own filesystem, UNC shares): ask wslpath
     if command_exists("wslpath"):
         try:
             result = subprocess.run(
@@ -88,46 +115,87 @@ def wsl_to_windows_path(path: Path) -> str:
         except Exception:
             pass
     
-    # Manual conversion: /mnt/c/... to C:\...
-    parts = abs_path.as_posix()
-    prefix = "/mnt/"
-    if parts.startswith(prefix) and len(parts) > len(prefix) + 2:
-        drive = parts[len(prefix)]
-        rest = parts[len(prefix) + 2:]
-        # Can't use backslashes directly in f-string expressions, so do replacement first
-        win_rest = rest.replace('/', '\\')
-        return f"{drive.upper()}:\\{win_rest}"
-    
     # If path doesn't start with /mnt/, it might be a Linux path
     # Try to use wslview or xdg-open instead
     return path_str
 
 
+# directory -> (st_mtime_ns, sorted images); reused until the directory changes
+_IMAGE_CACHE: Dict[Path, Tuple[int, List[Path]]] = {}
+
+
 def list_images(directory: Path) -> List[Path]:
     """Return sorted list of image files in directory (non-recursive)."""
-    files = [
-        p for p in directory.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
-    ]
-    return sorted(files, key=lambda p: p.name.lower())
+    mtime = os.stat(directory).st_mtime_ns
+    cached = _IMAGE_CACHE.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    # DirEntry.is_file() uses the type from readdir, avoiding a stat per entry;
+    # names stay plain strings until they are sorted
+    with os.scandir(directory) as entries:
+        names = [
+            entry.name for entry in entries
+            if entry.name.lower().endswith(_IMAGE_SUFFIXES) and entry.is_file()
+        ]
+    # fzf lists its input in order until a query is typed, so the list is kept
+    # sorted for it too; the cache means this runs once per directory change.
+    # key= already lowercases each name once (built-in decorate-sort-undecorate);
+    # sorting in place avoids copying the list
+    names.sort(key=str.lower)
+    files = [directory / name for name in names]
+    _IMAGE_CACHE[directory] = (mtime, files)
+    return files
+
+
+def _feed_fzf(stdin, images: List[Path]) -> None:
+    """Write the picker options to fzf line by line, then close its stdin."""
+    try:
+        for option in chain([RANDOM_TOKEN], (str(p) for p in images)):
+            stdin.write(f"{option}\n")
+        stdin.close()
+    except OSError:
+        pass  # fzf exited before reading everything (e.g. Esc)
 
 
-def pick_with_fzf(images: List[Path]) -> Optional[Path]:
-    """Use fzf for selection, with random option."""
+def pick_with_fzf(scan: Future[List[Path]]) -> Optional[Path]:
+    """Use fzf for selection, with random option. ``scan`` resolves to the image list."""
     if not command_exists("fzf"):
         return None
 
-    options = [RANDOM_TOKEN] + [str(p) for p in images]
-    fzf = subprocess.run(
+    fzf = subprocess.Popen(
         ["fzf", "--height=40%", "--border", "--prompt", "📷 Select image > ", "--header",
          "Enter = open | Esc = quit | select random option for 🎲"],
-        input="\n".join(options).encode(),
+        stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
     )
-    if fzf.returncode != 0:
+    # fzf has been starting up while the directory scan finished
+    try:
+        images = scan.result()
+    except BaseException:
+        # Give the terminal back before the scan error propagates
+        fzf.terminate()
+        fzf.wait()
+        raise
+    if not images:
+        fzf.terminate()  # SIGTERM lets fzf restore the terminal
+        fzf.wait()
+        return None
+
+    # Feed options from a writer thread so fzf can render and filter while
+    # the rest of the list is still being written
+    writer = threading.Thread(target=_feed_fzf, args=(fzf.stdin, images), daemon=True)
+    writer.start()
+    output = fzf.stdout.read()
+    returncode = fzf.wait()
+    writer.join()
+    if returncode != 0:
         return None
 
-    selection = fzf.stdout.decode().strip()
+    selection = output.strip()
     if not selection:
         return None
     if selection == RANDOM_TOKEN:
@@ -139,40 +207,43 @@ def fallback_menu(images: List[Path]) -> Optional[Path]:
     """Compact menu with max 50 images displayed."""
     MAX_DISPLAY = 50
     total_images = len(images)
-    
-    while True:
-        print("\n" + "="*70)
-        print(f"📷 Nimhirdykla - {total_images} image(s) found")
-        print("="*70)
-        
-        if total_images > MAX_DISPLAY:
-            print(f"\n⚠️  Too many images ({total_images}). Showing first {MAX_DISPLAY}.")
-            print(f"Enter a number 1-{MAX_DISPLAY} or a range like '1-50' to view specific images.")
-            display_images = images[:MAX_DISPLAY]
+
+    # The menu doesn't change between prompts: build it once, write it in one call
+    lines = ["", "="*70, f"📷 Nimhirdykla - {total_images} image(s) found", "="*70]
+
+    if total_images > MAX_DISPLAY:
+        lines.append(f"\n⚠️  Too many images ({total_images}). Showing first {MAX_DISPLAY}.")
+        lines.append(f"Enter a number 1-{MAX_DISPLAY} or a range like '1-50' to view specific images.")
+        display_images = images[:MAX_DISPLAY]
+    else:
+        display_images = images
+
+    # Display in compact 2-column format
+    lines.append(f"\n{'0) 🎲 RANDOM IMAGE':<35} {'':<35}")
+    lines.append("-" * 70)
+
+    # Display images in 2 columns
+    for i in range(0, len(display_images), 2):
+        row_images = display_images[i:i+2]
+        if len(row_images) == 2:
+            idx1 = i + 1
+            idx2 = i + 2
+            name1 = display_images[i].name[:32]  # Truncate long names
+            name2 = display_images[i+1].name[:32]
+            lines.append(f"{idx1:>3}) {name1:<32} {idx2:>3}) {name2:<32}")
         else:
-            display_images = images
-        
-        # Display in compact 2-column format
-        print(f"\n{'0) 🎲 RANDOM IMAGE':<35} {'':<35}")
-        print("-" * 70)
-        
-        # Display images in 2 columns
-        for i in range(0, len(display_images), 2):
-            row_images = display_images[i:i+2]
-            if len(row_images) == 2:
-                idx1 = i + 1
-                idx2 = i + 2
-                name1 = display_images[i].name[:32]  # Truncate long names
-                name2 = display_images[i+1].name[:32]
-                print(f"{idx1:>3}) {name1:<32} {idx2:>3}) {name2:<32}")
-            else:
-                idx = i + 1
-                name = row_images[0].name[:32]
-                print(f"{idx:>3}) {name:<32}")
-        
-        if total_images > MAX_DISPLAY:
-            print(f"\n💡 Tip: Enter number 1-{MAX_DISPLAY} or range like '10-20'")
-        
+            idx = i + 1
+            name = row_images[0].name[:32]
+            lines.append(f"{idx:>3}) {name:<32}")
+
+    if total_images > MAX_DISPLAY:
+        lines.append(f"\n💡 Tip: Enter number 1-{MAX_DISPLAY} or range like '10-20'")
+
+    menu = "\n".join(lines) + "\n"
+
+    while True:
+        sys.stdout.write(menu)
+
         choice = input("\nSelect number, 'r' for random, 'q' to quit: ").strip().lower()
 
         if choice in ("q", "quit", "exit"):
@@ -203,10 +274,13 @@ def fallback_menu(images: List[Path]) -> Optional[Path]:
         print("❌ Invalid selection. Try again.")
 
 
+_RNG = random.Random()
+
+
 def get_random_image(images: List[Path]) -> Optional[Path]:
     if not images:
         return None
-    return random.choice(images)
+    return images[_RNG.randrange(len(images))]
 
 
 # ---------------------------------------------------------------------------
@@ -232,16 +306,11 @@ def display_inline(path: Path, preferred: Optional[str] = None) -> bool:
     candidates: Iterable[Sequence[str]]
 
     if preferred:
-        candidates = [
-            tuple([preferred]),
-        ]
+        candidates = [(preferred,)] if command_exists(preferred) else []
     else:
-        candidates = INLINE_TOOLS
+        candidates = AVAILABLE_INLINE_TOOLS
 
     for tool_tuple in candidates:
-        tool = tool_tuple[0]
-        if not command_exists(tool):
-            continue
         cmd = list(tool_tuple) + [str(path)]
         try:
             subprocess.run(cmd, check=False)
@@ -293,8 +362,8 @@ def open_image_wsl(path: Path) -> None:
         # Try explorer.exe (most reliable on Windows)
         if command_exists("explorer.exe"):
             try:
-                # Use quotes to handle paths with spaces
-                subprocess.run(["explorer.exe", win_path], check=False, timeout=5)
+                # Don't wait: the exit code isn't used and explorer.exe returns once the viewer is up
+                subprocess.Popen(["explorer.exe", win_path])
                 return
             except Exception:
                 pass
@@ -302,7 +371,7 @@ def open_image_wsl(path: Path) -> None:
         # Try cmd.exe start as fallback
         if command_exists("cmd.exe"):
             try:
-                subprocess.run(["cmd.exe", "/c", "start", "", win_path], check=False, timeout=5)
+                subprocess.Popen(["cmd.exe", "/c", "start", "", win_path])
                 return
             except Exception:
                 pass
@@ -320,9 +389,10 @@ def open_image_wsl(path: Path) -> None:
 
 def open_image_windows(path: Path) -> None:
     abs_path = str(path.resolve())
-    if command_exists("start"):
-        subprocess.run(["start", abs_path], shell=True)  # start needs shell on Windows
-    else:
+    # os.startfile calls ShellExecute directly; "start" is a cmd builtin, not on PATH
+    try:
+        os.startfile(abs_path)
+    except OSError:
         subprocess.run(["explorer.exe", abs_path])
 
 
@@ -371,13 +441,16 @@ def main() -> None:
         print(f"Error: Directory '{target_dir}' does not exist.")
         sys.exit(1)
 
+    scanner = ThreadPoolExecutor(max_workers=1)
     while True:
-        images = list_images(target_dir)
+        # Scan in the background so it overlaps with spawning fzf
+        scan = scanner.submit(list_images, target_dir)
+        selected = pick_with_fzf(scan)
+        images = scan.result()
         if not images:
             print(f"No image files found in directory: {target_dir}")
             sys.exit(1)
 
-        selected = pick_with_fzf(images)
         if selected is None:
             selected = fallback_menu(images)
         if selected is None: